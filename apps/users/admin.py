@@ -0,0 +1,271 @@
+import json
+
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.admin.options import IncorrectLookupParameters, get_content_type_for_model
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.forms import UserChangeForm, UserCreationForm
+from django.core.paginator import Paginator
+from django.db import connections, models, router, transaction
+from django.template.response import TemplateResponse
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from .availability import availability_index
+from .models import CustomUser
+
+CURSOR_VAR = 'after'
+
+# Below this many rows an exact COUNT(*) is cheap enough to be worth running.
+EXACT_COUNT_THRESHOLD = 10000
+
+# Keeps ``pk IN (...)`` lists under SQLite's bound-parameter limit.
+DELETE_CHUNK_SIZE = 900
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that reads row counts from the PostgreSQL planner statistics
+    instead of running COUNT(*) over the whole table.
+    """
+
+    is_estimated = False
+
+    @cached_property
+    def count(self):
+        estimate = self._estimate_count()
+        if estimate is None or estimate < EXACT_COUNT_THRESHOLD:
+            self.is_estimated = False
+            return super().count
+        self.is_estimated = True
+        return estimate
+
+    def _estimate_count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        with connection.cursor() as cursor:
+            if not queryset.query.where:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+                # reltuples is -1 until the table has been analyzed.
+                if row is None or row[0] < 0:
+                    return None
+                return int(row[0])
+
+            sql, params = queryset.query.sql_with_params()
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Change list that pages with ``WHERE pk < <cursor>`` instead of OFFSET,
+    so every page costs the same regardless of how deep the admin scrolls.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = request.GET.get(CURSOR_VAR) or None
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_ordering(self, request, queryset):
+        # Keyset pagination is only correct for a stable, indexed ordering.
+        return ['-pk']
+
+    def get_results(self, request):
+        paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
+
+        queryset = self.queryset
+        if self.cursor is not None:
+            try:
+                queryset = queryset.filter(pk__lt=int(self.cursor))
+            except ValueError:
+                raise IncorrectLookupParameters
+        concrete_fields = {field.name for field in self.model._meta.concrete_fields}
+        queryset = queryset.only('pk', *[
+            name for name in self.list_display if name in concrete_fields
+        ])
+
+        rows = list(queryset[:self.list_per_page + 1])
+        has_next = len(rows) > self.list_per_page
+        result_list = rows[:self.list_per_page]
+
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = result_list
+        self.can_show_all = False
+        self.multi_page = has_next or self.cursor is not None
+        self.paginator = paginator
+        self.count_is_estimated = paginator.is_estimated
+        self.next_page_url = (
+            self.get_query_string({CURSOR_VAR: result_list[-1].pk})
+            if has_next else None
+        )
+        self.first_page_url = (
+            self.get_query_string(remove=[CURSOR_VAR])
+            if self.cursor is not None else None
+        )
+
+
+class CustomUserChangeForm(UserChangeForm):
+    class Meta(UserChangeForm.Meta):
+        model = CustomUser
+
+
+class CustomUserCreationForm(UserCreationForm):
+    class Meta(UserCreationForm.Meta):
+        model = CustomUser
+
+
+@admin.register(CustomUser)
+class CustomUserAdmin(UserAdmin):
+    form = CustomUserChangeForm
+    add_form = CustomUserCreationForm
+    fieldsets = UserAdmin.fieldsets + (
+        (_('Profile'), {'fields': ('bio', 'birth_date', 'avatar')}),
+    )
+
+    # Only indexed, narrow columns: the pk, the unique username and the
+    # indexed email. Wide columns like ``bio`` never reach the list query.
+    list_display = ('id', 'username', 'email')
+    list_display_links = ('username',)
+    list_filter = ('is_active', 'is_staff')
+    # Case-sensitive prefix lookups compile to ``LIKE 'term%'``, which the
+    # username/email pattern-ops indexes can serve without a sequential scan.
+    search_fields = ('username__startswith', 'email__startswith')
+    search_help_text = _('Search by username or email prefix (case-sensitive).')
+    ordering = ('-pk',)
+    sortable_by = ()
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('activate_users', 'deactivate_users', 'delete_users')
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # The stock action loads every selected row and its relations.
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(description=_('Activate selected users'), permissions=['change'])
+    def activate_users(self, request, queryset):
+        updated = queryset.filter(is_active=False).update(is_active=True)
+        self.message_user(request, _('Activated %d users.') % updated, messages.SUCCESS)
+
+    @admin.action(description=_('Deactivate selected users'), permissions=['change'])
+    def deactivate_users(self, request, queryset):
+        updated = (
+            queryset.filter(is_active=True)
+            .exclude(pk=request.user.pk)
+            .update(is_active=False)
+        )
+        self.message_user(request, _('Deactivated %d users.') % updated, messages.SUCCESS)
+
+    @admin.action(description=_('Delete selected users'), permissions=['delete'])
+    def delete_users(self, request, queryset):
+        queryset = queryset.exclude(pk=request.user.pk)
+        if request.POST.get('post') != 'yes':
+            paginator = EstimatedCountPaginator(queryset, self.list_per_page)
+            return TemplateResponse(
+                request,
+                'admin/users/customuser/delete_users_confirmation.html',
+                {
+                    **self.admin_site.each_context(request),
+                    'title': _('Are you sure?'),
+                    'opts': self.opts,
+                    'media': self.media,
+                    'objects_name': self.opts.verbose_name_plural,
+                    'count': paginator.count,
+                    'count_prefix': '~' if paginator.is_estimated else '',
+                    'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+                    'select_across': request.POST.get('select_across') == '1',
+                    'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+                },
+            )
+
+        deleted = bulk_delete_users(queryset)
+        # One summary entry instead of the per-object entries of the stock
+        # action, which would need every instance loaded.
+        LogEntry.objects.log_action(
+            user_id=request.user.pk,
+            content_type_id=get_content_type_for_model(self.model).pk,
+            object_id=None,
+            object_repr=_('%d users') % deleted,
+            action_flag=DELETION,
+            change_message=_('Bulk deleted %d users.') % deleted,
+        )
+        self.message_user(request, _('Deleted %d users.') % deleted, messages.SUCCESS)
+
+
+def bulk_delete_users(queryset):
+    """
+    Delete users with set-based DELETE statements instead of collecting every
+    instance with its relations. The selected primary keys are read once, then
+    rows pointing at the users are cascaded or nulled with one statement per
+    relation and chunk.
+
+    The user rows are then deleted directly, bypassing the collector, so no
+    instance is loaded and ``pre_delete``/``post_delete`` are not sent. The
+    only receiver, the availability index's, is told about the deletions
+    through ``discard_many()`` instead.
+    """
+    model = queryset.model
+    using = router.db_for_write(model)
+    relations = model._meta.related_objects
+    if any(
+        not relation.many_to_many
+        and relation.on_delete not in (models.CASCADE, models.SET_NULL, models.DO_NOTHING)
+        for relation in relations
+    ):
+        # PROTECT, RESTRICT and custom handlers need the full collector.
+        return queryset.delete()[1].get(model._meta.label, 0)
+
+    deleted = 0
+    with transaction.atomic(using=using):
+        # Resolve the selection before touching anything: filters that span a
+        # relation deleted below would otherwise stop matching half way.
+        pks = list(queryset.order_by().values_list('pk', flat=True))
+        for start in range(0, len(pks), DELETE_CHUNK_SIZE):
+            chunk = pks[start:start + DELETE_CHUNK_SIZE]
+            for relation in relations:
+                if relation.many_to_many:
+                    through = getattr(model, relation.get_accessor_name()).through
+                    through._base_manager.using(using).filter(**{
+                        '%s__in' % relation.field.m2m_reverse_field_name(): chunk,
+                    }).delete()
+                    continue
+                related = relation.related_model._base_manager.using(using).filter(**{
+                    '%s__in' % relation.field.name: chunk,
+                })
+                if relation.on_delete is models.CASCADE:
+                    related.delete()
+                elif relation.on_delete is models.SET_NULL:
+                    related.update(**{relation.field.name: None})
+            for field in model._meta.local_many_to_many:
+                getattr(model, field.name).through._base_manager.using(using).filter(**{
+                    '%s__in' % field.m2m_field_name(): chunk,
+                }).delete()
+            deleted += model._base_manager.using(using).filter(pk__in=chunk)._raw_delete(using)
+    availability_index.discard_many(deleted)
+    return deleted
@@ -0,0 +1,229 @@
+"""
+Batched, asynchronous security audit log.
+
+Views call ``record()``, which appends a compact tuple to a bounded in-process
+buffer and returns immediately. A daemon flusher thread drains the buffer in
+batches and hands them to a sink:
+
+- ``database``: one ``bulk_create`` per batch into the append-only
+  ``AuditEvent`` table.
+- ``ndjson``: appends to local files partitioned by UTC hour
+  (``audit-YYYYMMDDHH.ndjson``), for shipping to external log storage.
+
+A batch the sink fails to write is put back at the head of the buffer and
+retried with exponential backoff. When the buffer is full, ``record()`` waits up to ``BLOCK_TIMEOUT`` seconds
+for the flusher to make room (back-pressure), then drops the event and counts
+it. The flusher is started from the WSGI/ASGI entry points; processes that
+never start it (management commands, tests) keep at most ``BUFFER_SIZE``
+events in memory. Servers that import the application before forking
+workers hand each child a copy of a dead flusher thread, so ``record()``
+starts a fresh one the first time it runs in a new process.
+"""
+import atexit
+import collections
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Upper bound, in seconds, for the flusher's backoff after failed writes.
+MAX_RETRY_DELAY = 60.0
+
+AuditRecord = collections.namedtuple(
+    'AuditRecord', 'created_at event_type user_id username ip_address detail'
+)
+
+DEFAULTS = {
+    'SINK': 'database',
+    'BUFFER_SIZE': 10000,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,
+    'BLOCK_TIMEOUT': 0.0,
+    'NDJSON_DIR': 'audit',
+}
+
+
+def get_config(name):
+    return getattr(settings, 'AUDIT_LOG', {}).get(name, DEFAULTS[name])
+
+
+class DatabaseSink:
+    def write(self, records):
+        from .models import AuditEvent
+
+        AuditEvent.objects.bulk_create(
+            [AuditEvent(**record._asdict()) for record in records],
+            batch_size=get_config('BATCH_SIZE'),
+        )
+
+
+class NdjsonSink:
+    def write(self, records):
+        directory = get_config('NDJSON_DIR')
+        os.makedirs(directory, exist_ok=True)
+        partitions = collections.defaultdict(list)
+        for record in records:
+            line = json.dumps(record._asdict(), default=str, separators=(',', ':'))
+            partitions[record.created_at.strftime('%Y%m%d%H')].append(line)
+        for hour, lines in partitions.items():
+            path = os.path.join(directory, f'audit-{hour}.ndjson')
+            with open(path, 'a', encoding='utf-8') as stream:
+                stream.write('\n'.join(lines) + '\n')
+
+
+SINKS = {
+    'database': DatabaseSink,
+    'ndjson': NdjsonSink,
+}
+
+
+class AuditLog:
+    def __init__(self):
+        self._buffer = collections.deque()
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+        self._pid = None
+        self._atexit_registered = False
+        self.recorded = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed = 0
+        self._failures = 0
+
+    def record(self, event_type, request=None, user=None, username='', detail=''):
+        if self._pid is not None and self._pid != os.getpid():
+            self._restart_after_fork()
+        if user is not None and user.is_authenticated:
+            user_id, username = user.pk, username or user.get_username()
+        else:
+            user_id = None
+        ip_address = request.META.get('REMOTE_ADDR') if request is not None else None
+        # ``username`` may come straight from a request body of any JSON type.
+        record = AuditRecord(
+            timezone.now(), event_type, user_id,
+            str(username or '')[:150], ip_address, str(detail or '')[:150],
+        )
+
+        capacity = get_config('BUFFER_SIZE')
+        with self._condition:
+            if len(self._buffer) >= capacity:
+                timeout = get_config('BLOCK_TIMEOUT')
+                if timeout > 0 and self._flusher is not None:
+                    self._condition.notify_all()
+                    self._condition.wait_for(lambda: len(self._buffer) < capacity, timeout)
+                if len(self._buffer) >= capacity:
+                    self.dropped += 1
+                    return False
+            self._buffer.append(record)
+            self.recorded += 1
+            if len(self._buffer) >= get_config('BATCH_SIZE'):
+                self._condition.notify_all()
+        return True
+
+    def flush(self):
+        """
+        Drain the buffer synchronously, one batch at a time. Returns the
+        number of events written.
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._condition:
+                    batch_size = get_config('BATCH_SIZE')
+                    batch = [
+                        self._buffer.popleft()
+                        for _ in range(min(batch_size, len(self._buffer)))
+                    ]
+                    # Wake producers waiting for room.
+                    self._condition.notify_all()
+                if not batch:
+                    return written
+                try:
+                    SINKS[get_config('SINK')]().write(batch)
+                except Exception:
+                    self.failed += len(batch)
+                    self._failures += 1
+                    logger.exception('Failed to write %d audit events', len(batch))
+                    self._requeue(batch)
+                    return written
+                self._failures = 0
+                self.flushed += len(batch)
+                written += len(batch)
+
+    def _requeue(self, batch):
+        """
+        Put a batch that failed to write back at the head of the buffer, in
+        order, so it is retried first. Events that no longer fit are dropped.
+        """
+        with self._condition:
+            room = max(0, get_config('BUFFER_SIZE') - len(self._buffer))
+            self.dropped += max(0, len(batch) - room)
+            self._buffer.extendleft(reversed(batch[:room]))
+
+    def start(self):
+        with self._condition:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._pid = os.getpid()
+            self._flusher = threading.Thread(
+                target=self._run, name='audit-log-flusher', daemon=True
+            )
+            self._flusher.start()
+            if not self._atexit_registered:
+                atexit.register(self.flush)
+                self._atexit_registered = True
+
+    def _restart_after_fork(self):
+        """
+        Start a flusher in a forked child. The locks may have been copied
+        while held by a parent thread that does not exist here, so they are
+        replaced, and buffered events are dropped because the parent still
+        owns and writes them.
+        """
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._buffer = collections.deque()
+        self._flusher = None
+        self._failures = 0
+        self.start()
+
+    def _run(self):
+        while True:
+            if self._failures:
+                # Back off exponentially while the sink keeps failing.
+                time.sleep(min(
+                    get_config('FLUSH_INTERVAL') * 2 ** min(self._failures, 16),
+                    MAX_RETRY_DELAY,
+                ))
+            else:
+                deadline = time.monotonic() + get_config('FLUSH_INTERVAL')
+                with self._condition:
+                    self._condition.wait_for(
+                        lambda: len(self._buffer) >= get_config('BATCH_SIZE'),
+                        max(0.0, deadline - time.monotonic()),
+                    )
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def stats(self):
+        return {
+            'buffered': len(self._buffer),
+            'recorded': self.recorded,
+            'dropped': self.dropped,
+            'flushed': self.flushed,
+            'failed': self.failed,
+        }
+
+
+audit_log = AuditLog()
+record = audit_log.record
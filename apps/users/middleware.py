@@ -0,0 +1,201 @@
+"""
+Admission control for request classes with very different costs.
+
+Password hashing makes the auth endpoints orders of magnitude more expensive
+than plain reads. Under a burst they can occupy every sync worker and starve
+cheap requests. This middleware caps how many requests of each class run at
+once across all worker processes, and rejects requests that already waited
+too long in the proxy/socket queue, answering with a fast 503 and
+``Retry-After`` instead of doing work the client will never see.
+
+Concurrency slots are ``flock`` locks on files in a shared directory, so the
+limit holds across gunicorn worker processes on the same host and a crashed
+worker releases its slot automatically. Platforms without ``fcntl`` fall back
+to a per-process semaphore.
+"""
+import os
+import random
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.http import JsonResponse
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+DEFAULT_CLASS = 'default'
+
+# Weight of the newest sample in the per-class latency moving average.
+LATENCY_SMOOTHING = 0.2
+
+
+class Bulkhead:
+    def __init__(self, name, size, lock_dir):
+        self.size = size
+        if fcntl is None:
+            self._semaphore = threading.BoundedSemaphore(size)
+            return
+        os.makedirs(lock_dir, exist_ok=True)
+        self._paths = [os.path.join(lock_dir, f'{name}.{i}.lock') for i in range(size)]
+
+    def acquire(self):
+        """
+        Claim a free slot without blocking. Return a token for ``release``,
+        or ``None`` when every slot is taken.
+        """
+        if fcntl is None:
+            return True if self._semaphore.acquire(blocking=False) else None
+        # Start at a random slot so workers do not all contend on slot 0.
+        offset = random.randrange(self.size)
+        for i in range(self.size):
+            fd = os.open(self._paths[(offset + i) % self.size], os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            return fd
+        return None
+
+    def release(self, token):
+        if fcntl is None:
+            self._semaphore.release()
+            return
+        try:
+            fcntl.flock(token, fcntl.LOCK_UN)
+        finally:
+            os.close(token)
+
+
+def parse_request_start(value):
+    """
+    Parse an ``X-Request-Start`` header into epoch seconds. Proxies send
+    ``t=<seconds>`` (nginx ``$msec``) or integer milliseconds/microseconds.
+    """
+    if not value:
+        return None
+    if value.startswith('t='):
+        value = value[2:]
+    try:
+        started = float(value)
+    except ValueError:
+        return None
+    if started > 1e14:
+        return started / 1e6
+    if started > 1e11:
+        return started / 1e3
+    return started
+
+
+class AdmissionControlMiddleware:
+    """
+    Shed load per endpoint class before the view runs.
+
+    A request is rejected with 503 when
+    - the time it spent queued before reaching Django already exceeds its
+      deadline,
+    - the queue time plus the class's recent average latency would overrun
+      the deadline, or
+    - every concurrency slot of its class is in use.
+
+    The deadline is the class's ``deadline_ms``, tightened by the client's
+    ``X-Request-Timeout`` header (milliseconds) when that is lower.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = getattr(settings, 'ADMISSION_CONTROL', {})
+        self.enabled = config.get('ENABLED', True)
+        self.request_start_header = config.get('REQUEST_START_HEADER', 'HTTP_X_REQUEST_START')
+        self.deadline_header = config.get('DEADLINE_HEADER', 'HTTP_X_REQUEST_TIMEOUT')
+        lock_dir = config.get(
+            'LOCK_DIR', os.path.join(tempfile.gettempdir(), 'admission-control')
+        )
+
+        self.classes = config.get('CLASSES', {})
+        self.class_by_view = {
+            view: name
+            for name, options in self.classes.items()
+            for view in options.get('views', ())
+        }
+        self.bulkheads = {
+            name: Bulkhead(name, options['max_concurrent'], lock_dir)
+            for name, options in self.classes.items()
+            if options.get('max_concurrent')
+        }
+        self.latency = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            admission = getattr(request, '_admission', None)
+            if admission is not None:
+                name, slot, started = admission
+                if slot is not None:
+                    self.bulkheads[name].release(slot)
+                self._record_latency(name, time.monotonic() - started)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.enabled:
+            return None
+        name = self.class_by_view.get(request.resolver_match.view_name, DEFAULT_CLASS)
+        options = self.classes.get(name, {})
+
+        deadline = self._deadline(request, options)
+        if deadline is not None:
+            queued = self._queue_time(request)
+            if queued is not None and queued > deadline:
+                return self._reject(options)
+            if queued is not None and queued + self.latency.get(name, 0.0) > deadline:
+                # Decay the estimate on every predicted miss so a stale, high
+                # average cannot shed the class forever.
+                self._record_latency(name, 0.0)
+                return self._reject(options)
+
+        slot = None
+        bulkhead = self.bulkheads.get(name)
+        if bulkhead is not None:
+            slot = bulkhead.acquire()
+            if slot is None:
+                return self._reject(options)
+
+        request._admission = (name, slot, time.monotonic())
+        return None
+
+    def _deadline(self, request, options):
+        deadlines = []
+        if options.get('deadline_ms'):
+            deadlines.append(options['deadline_ms'] / 1000)
+        try:
+            deadlines.append(float(request.META[self.deadline_header]) / 1000)
+        except (KeyError, ValueError):
+            pass
+        return min(deadlines) if deadlines else None
+
+    def _queue_time(self, request):
+        started = parse_request_start(request.META.get(self.request_start_header))
+        if started is None:
+            return None
+        return max(0.0, time.time() - started)
+
+    def _record_latency(self, name, elapsed):
+        with self._lock:
+            previous = self.latency.get(name)
+            if previous is None:
+                self.latency[name] = elapsed
+            else:
+                self.latency[name] = previous + LATENCY_SMOOTHING * (elapsed - previous)
+
+    def _reject(self, options):
+        response = JsonResponse(
+            {"error": "Service temporarily overloaded, please retry."},
+            status=503,
+        )
+        response['Retry-After'] = str(options.get('retry_after', 1))
+        return response
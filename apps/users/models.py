@@ -1,10 +1,141 @@
-from django.contrib.auth.models import AbstractUser
+from django.conf import settings
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
+from django.utils import timezone
+
+# Changing one of these must move ``updated_at`` so processes that sync from
+# it (the availability index) see the new value.
+IDENTITY_FIELDS = frozenset(('username', 'email'))
+
+class CustomUserQuerySet(models.QuerySet):
+    """
+    Moves ``updated_at`` on set-based writes to ``IDENTITY_FIELDS`` too, as
+    ``save()`` does. Other bulk writes (e.g. activating users) leave it alone.
+    Raw SQL still bypasses it.
+    """
+    def update(self, **kwargs):
+        if IDENTITY_FIELDS & kwargs.keys():
+            kwargs.setdefault('updated_at', timezone.now())
+        return super().update(**kwargs)
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        if IDENTITY_FIELDS & set(fields) and 'updated_at' not in fields:
+            now = timezone.now()
+            for obj in objs:
+                obj.updated_at = now
+            fields = [*fields, 'updated_at']
+        return super().bulk_update(objs, fields, batch_size=batch_size)
+
+class CustomUserManager(UserManager.from_queryset(CustomUserQuerySet)):
+    pass
 
 class CustomUser(AbstractUser):
     bio = models.TextField(max_length=500, blank=True)
     birth_date = models.DateField(null=True, blank=True)
     avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = CustomUserManager()
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # varchar_pattern_ops serves both equality and ``LIKE 'prefix%'``
+            # lookups on PostgreSQL regardless of the database collation.
+            models.Index(
+                fields=['email'],
+                name='users_email_prefix_idx',
+                opclasses=['varchar_pattern_ops'],
+            ),
+        ]
+
+    def __str__(self):
+        return self.username
+
+    def save(self, *args, update_fields=None, **kwargs):
+        # auto_now fields are only written when listed in update_fields.
+        if update_fields is not None and IDENTITY_FIELDS & set(update_fields):
+            update_fields = {*update_fields, 'updated_at'}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+class AuditEventQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        raise TypeError('Audit events are append-only.')
+
+    def delete(self):
+        raise TypeError('Audit events are append-only; use purge() for retention.')
+
+    def purge(self, before=None):
+        """
+        Retention escape hatch: delete the events in this queryset created
+        before ``before`` (all of them when omitted). Returns the number of
+        rows deleted.
+        """
+        return self.in_range(end=before).order_by()._raw_delete(self.db)
+
+    def in_range(self, start=None, end=None):
+        queryset = self
+        if start is not None:
+            queryset = queryset.filter(created_at__gte=start)
+        if end is not None:
+            queryset = queryset.filter(created_at__lt=end)
+        return queryset
+
+    def for_user(self, user, start=None, end=None):
+        user_id = getattr(user, 'pk', user)
+        return self.filter(user_id=user_id).in_range(start, end).order_by('-created_at')
+
+class AuditEvent(models.Model):
+    """
+    Append-only security audit record, written in batches by the flusher in
+    ``apps.users.audit``. ``user`` carries no database constraint so events
+    outlive the account and inserts never lock the user row. Updates and
+    deletes raise; retention jobs go through ``AuditEvent.objects.purge()``.
+    """
+    LOGIN = 'login'
+    LOGIN_FAILED = 'login_failed'
+    PASSWORD_CHANGE = 'password_change'
+    PASSWORD_RESET_REQUEST = 'password_reset_request'
+    PASSWORD_RESET = 'password_reset'
+    USERNAME_CHANGE = 'username_change'
+    EVENT_TYPES = (
+        (LOGIN, 'Login'),
+        (LOGIN_FAILED, 'Failed login'),
+        (PASSWORD_CHANGE, 'Password change'),
+        (PASSWORD_RESET_REQUEST, 'Password reset request'),
+        (PASSWORD_RESET, 'Password reset'),
+        (USERNAME_CHANGE, 'Username change'),
+    )
+
+    created_at = models.DateTimeField()
+    event_type = models.CharField(max_length=32, choices=EVENT_TYPES)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name='+',
+    )
+    username = models.CharField(max_length=150, blank=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    detail = models.CharField(max_length=150, blank=True)
+
+    objects = AuditEventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='audit_user_created_idx'),
+            models.Index(fields=['created_at'], name='audit_created_idx'),
+        ]
 
     def __str__(self):
-        return self.username
\ No newline at end of file
+        return f'{self.event_type} {self.username} {self.created_at:%Y-%m-%d %H:%M:%S}'
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise TypeError('Audit events are append-only.')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise TypeError('Audit events are append-only; use AuditEvent.objects.purge() for retention.')
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .availability import availability_index
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def index_user_on_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & set(availability_index.fields):
+        return
+    availability_index.add(instance)
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def unindex_user_on_delete(sender, instance, **kwargs):
+    availability_index.discard(instance)
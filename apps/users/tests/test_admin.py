@@ -0,0 +1,138 @@
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from unittest.mock import patch
+from ..admin import CustomUserAdmin, bulk_delete_users
+from ..models import CustomUser
+
+class CustomUserAdminTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='AdminPass123!'
+        )
+        self.client.force_login(self.admin)
+        self.changelist_url = reverse('admin:users_customuser_changelist')
+        self.users = [
+            CustomUser.objects.create_user(
+                username=f'user{i:03d}',
+                email=f'user{i:03d}@example.com',
+                password='Pass123!'
+            )
+            for i in range(5)
+        ]
+
+    @patch.object(CustomUserAdmin, 'list_per_page', 2)
+    def test_changelist_pages_by_cursor(self):
+        response = self.client.get(self.changelist_url)
+        self.assertEqual(response.status_code, 200)
+        cl = response.context['cl']
+        self.assertEqual(
+            [user.pk for user in cl.result_list],
+            [self.users[4].pk, self.users[3].pk]
+        )
+        self.assertIsNone(cl.first_page_url)
+
+        response = self.client.get(self.changelist_url + cl.next_page_url)
+        cl = response.context['cl']
+        self.assertEqual(
+            [user.pk for user in cl.result_list],
+            [self.users[2].pk, self.users[1].pk]
+        )
+        self.assertIsNotNone(cl.first_page_url)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.changelist_url, {'after': 'abc'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_prefix_search(self):
+        response = self.client.get(self.changelist_url, {'q': 'user00'})
+        self.assertEqual(len(response.context['cl'].result_list), 5)
+
+        response = self.client.get(self.changelist_url, {'q': 'ser00'})
+        self.assertEqual(len(response.context['cl'].result_list), 0)
+
+    def test_bulk_activate_and_deactivate(self):
+        pks = [user.pk for user in self.users[:2]] + [self.admin.pk]
+        response = self.client.post(self.changelist_url, {
+            'action': 'deactivate_users',
+            '_selected_action': pks,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(CustomUser.objects.filter(is_active=False).count(), 2)
+        # The acting admin never locks themselves out.
+        self.assertTrue(CustomUser.objects.get(pk=self.admin.pk).is_active)
+
+        self.client.post(self.changelist_url, {
+            'action': 'activate_users',
+            '_selected_action': pks,
+        })
+        self.assertFalse(CustomUser.objects.filter(is_active=False).exists())
+
+    def test_bulk_delete_requires_confirmation(self):
+        data = {
+            'action': 'delete_users',
+            '_selected_action': [self.users[0].pk, self.users[1].pk, self.admin.pk],
+        }
+        response = self.client.post(self.changelist_url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'admin/users/customuser/delete_users_confirmation.html')
+        self.assertEqual(response.context['count'], 2)
+        self.assertEqual(CustomUser.objects.count(), 6)
+
+    def test_bulk_delete(self):
+        group = Group.objects.create(name='members')
+        self.users[0].groups.add(group)
+
+        response = self.client.post(self.changelist_url, {
+            'action': 'delete_users',
+            '_selected_action': [self.users[0].pk, self.users[1].pk, self.admin.pk],
+            'post': 'yes',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(
+            CustomUser.objects.filter(pk__in=[self.users[0].pk, self.users[1].pk]).exists()
+        )
+        self.assertTrue(CustomUser.objects.filter(pk=self.admin.pk).exists())
+        self.assertFalse(CustomUser.groups.through.objects.filter(group=group).exists())
+
+        entry = LogEntry.objects.get()
+        self.assertEqual(entry.action_flag, DELETION)
+        self.assertEqual(entry.user, self.admin)
+
+    def test_bulk_delete_select_across(self):
+        response = self.client.post(self.changelist_url + '?q=user00', {
+            'action': 'delete_users',
+            '_selected_action': [self.users[0].pk],
+            'select_across': '1',
+            'post': 'yes',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(CustomUser.objects.all()), [self.admin])
+
+    def test_bulk_delete_users_returns_count(self):
+        deleted = bulk_delete_users(CustomUser.objects.filter(username__startswith='user'))
+        self.assertEqual(deleted, 5)
+
+    def test_bulk_delete_users_does_not_load_instances(self):
+        with CaptureQueriesContext(connection) as queries, \
+                patch('apps.users.admin.availability_index') as index:
+            bulk_delete_users(CustomUser.objects.filter(username__startswith='user'))
+        self.assertFalse([
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and '"password"' in query['sql']
+        ])
+        index.discard_many.assert_called_once_with(5)
+
+    def test_bulk_delete_users_filtered_through_deleted_relation(self):
+        group = Group.objects.create(name='members')
+        for user in self.users[:3]:
+            user.groups.add(group)
+
+        deleted = bulk_delete_users(CustomUser.objects.filter(groups__name='members'))
+        self.assertEqual(deleted, 3)
+        self.assertEqual(CustomUser.objects.count(), 3)
@@ -0,0 +1,189 @@
+import datetime
+import json
+import os
+import tempfile
+from unittest.mock import patch
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ..audit import AuditLog, DatabaseSink, audit_log
+from ..models import AuditEvent
+
+User = get_user_model()
+
+class AuditLogTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='TestPass123!'
+        )
+        self.log = AuditLog()
+
+    def test_flush_bulk_inserts_events(self):
+        self.log.record(AuditEvent.LOGIN, user=self.user)
+        self.log.record(AuditEvent.LOGIN_FAILED, username='nobody')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.log.flush(), 2)
+        self.assertEqual(AuditEvent.objects.count(), 2)
+        self.assertEqual(self.log.stats()['buffered'], 0)
+
+    @override_settings(AUDIT_LOG={'BUFFER_SIZE': 2})
+    def test_full_buffer_drops_and_counts(self):
+        self.assertTrue(self.log.record(AuditEvent.LOGIN, user=self.user))
+        self.assertTrue(self.log.record(AuditEvent.LOGIN, user=self.user))
+        self.assertFalse(self.log.record(AuditEvent.LOGIN, user=self.user))
+
+        stats = self.log.stats()
+        self.assertEqual(stats['recorded'], 2)
+        self.assertEqual(stats['dropped'], 1)
+
+    @patch('apps.users.audit.atexit.register')
+    @patch('apps.users.audit.threading.Thread')
+    def test_forked_child_restarts_flusher(self, thread, register):
+        thread.return_value.is_alive.return_value = True
+        self.log.start()
+        self.log.record(AuditEvent.LOGIN, user=self.user)
+        self.assertEqual(thread.call_count, 1)
+
+        with patch('apps.users.audit.os.getpid', return_value=self.log._pid + 1):
+            self.log.record(AuditEvent.LOGIN, user=self.user)
+            self.log.record(AuditEvent.LOGIN, user=self.user)
+        self.assertEqual(thread.call_count, 2)
+        # Events buffered before the fork belong to the parent.
+        self.assertEqual(self.log.stats()['buffered'], 2)
+        register.assert_called_once_with(self.log.flush)
+
+    def test_failed_batch_is_requeued(self):
+        self.log.record(AuditEvent.LOGIN, user=self.user)
+        self.log.record(AuditEvent.LOGIN_FAILED, username='nobody')
+
+        with patch.object(DatabaseSink, 'write', side_effect=DatabaseError('down')), \
+                self.assertLogs('apps.users.audit', level='ERROR'):
+            self.assertEqual(self.log.flush(), 0)
+        stats = self.log.stats()
+        self.assertEqual(stats['buffered'], 2)
+        self.assertEqual(stats['dropped'], 0)
+
+        self.assertEqual(self.log.flush(), 2)
+        self.assertEqual(
+            list(AuditEvent.objects.order_by('pk').values_list('event_type', flat=True)),
+            [AuditEvent.LOGIN, AuditEvent.LOGIN_FAILED]
+        )
+
+    @override_settings(AUDIT_LOG={'BUFFER_SIZE': 2, 'BATCH_SIZE': 1})
+    def test_requeue_respects_capacity(self):
+        self.log.record(AuditEvent.LOGIN, user=self.user)
+        self.log.record(AuditEvent.LOGIN, user=self.user)
+
+        def fill_and_fail(records):
+            self.log.record(AuditEvent.LOGIN, user=self.user)
+            raise DatabaseError('down')
+
+        with patch.object(DatabaseSink, 'write', side_effect=fill_and_fail), \
+                self.assertLogs('apps.users.audit', level='ERROR'):
+            self.log.flush()
+        stats = self.log.stats()
+        self.assertEqual(stats['buffered'], 2)
+        self.assertEqual(stats['dropped'], 1)
+
+    def test_non_string_values_are_coerced(self):
+        self.log.record(AuditEvent.LOGIN_FAILED, username={'a': 1}, detail=123)
+        self.log.flush()
+        event = AuditEvent.objects.get()
+        self.assertEqual(event.username, "{'a': 1}")
+        self.assertEqual(event.detail, '123')
+
+    def test_ndjson_sink_partitions_by_hour(self):
+        directory = tempfile.mkdtemp()
+        with self.settings(AUDIT_LOG={'SINK': 'ndjson', 'NDJSON_DIR': directory}):
+            self.log.record(AuditEvent.PASSWORD_CHANGE, user=self.user)
+            self.log.flush()
+
+        [filename] = os.listdir(directory)
+        self.assertEqual(filename, f'audit-{timezone.now():%Y%m%d%H}.ndjson')
+        with open(os.path.join(directory, filename)) as stream:
+            event = json.loads(stream.readline())
+        self.assertEqual(event['event_type'], AuditEvent.PASSWORD_CHANGE)
+        self.assertEqual(event['user_id'], self.user.pk)
+
+    def test_query_helpers(self):
+        now = timezone.now()
+        AuditEvent.objects.bulk_create([
+            AuditEvent(created_at=now - datetime.timedelta(days=2), event_type=AuditEvent.LOGIN, user=self.user),
+            AuditEvent(created_at=now, event_type=AuditEvent.LOGIN, user=self.user),
+            AuditEvent(created_at=now, event_type=AuditEvent.LOGIN_FAILED, username='nobody'),
+        ])
+
+        self.assertEqual(AuditEvent.objects.for_user(self.user).count(), 2)
+        self.assertEqual(
+            AuditEvent.objects.for_user(self.user, start=now - datetime.timedelta(days=1)).count(),
+            1
+        )
+        self.assertEqual(AuditEvent.objects.in_range(end=now).count(), 1)
+
+    def test_events_are_append_only(self):
+        event = AuditEvent.objects.create(
+            created_at=timezone.now(), event_type=AuditEvent.LOGIN, user=self.user
+        )
+        event.username = 'someone'
+        with self.assertRaises(TypeError):
+            event.save()
+        with self.assertRaises(TypeError):
+            event.delete()
+        with self.assertRaises(TypeError):
+            AuditEvent.objects.update(username='someone')
+        with self.assertRaises(TypeError):
+            AuditEvent.objects.all().delete()
+        # Accounts can still be deleted; their events outlive them.
+        self.user.delete()
+        self.assertEqual(AuditEvent.objects.get().username, '')
+
+    def test_purge_deletes_events_before_cutoff(self):
+        now = timezone.now()
+        AuditEvent.objects.bulk_create([
+            AuditEvent(created_at=now - datetime.timedelta(days=2), event_type=AuditEvent.LOGIN),
+            AuditEvent(created_at=now, event_type=AuditEvent.LOGIN),
+        ])
+
+        self.assertEqual(AuditEvent.objects.purge(now - datetime.timedelta(days=1)), 1)
+        self.assertEqual(AuditEvent.objects.get().created_at, now)
+
+class AuditedViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='TestPass123!'
+        )
+        audit_log.flush()
+        AuditEvent.objects.purge()
+
+    def test_login_events(self):
+        url = reverse('users:login')
+        self.client.post(url, {'username': 'testuser', 'password': 'wrong'}, format='json')
+        self.client.post(url, {'username': 'testuser', 'password': 'TestPass123!'}, format='json')
+        audit_log.flush()
+
+        self.assertEqual(
+            list(AuditEvent.objects.for_user(self.user).values_list('event_type', flat=True)),
+            [AuditEvent.LOGIN, AuditEvent.LOGIN_FAILED]
+        )
+
+    def test_username_change_event(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.put(reverse('users:update-username'), {
+            'username': 'newusername',
+            'current_password': 'TestPass123!'
+        }, format='json')
+        audit_log.flush()
+
+        event = AuditEvent.objects.for_user(self.user).get()
+        self.assertEqual(event.event_type, AuditEvent.USERNAME_CHANGE)
+        self.assertEqual(event.username, 'newusername')
+        self.assertEqual(event.detail, 'testuser')
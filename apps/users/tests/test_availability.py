@@ -0,0 +1,93 @@
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from ..availability import AvailabilityIndex, BloomFilter
+
+User = get_user_model()
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        values = [f'user{i}' for i in range(1000)]
+        for value in values:
+            bloom.add(value)
+        self.assertTrue(all(value in bloom for value in values))
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(capacity=10000, error_rate=0.01)
+        for i in range(10000):
+            bloom.add(f'taken{i}')
+        false_positives = sum(f'free{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives / 10000, 0.02)
+
+    def test_readding_is_not_counted(self):
+        bloom = BloomFilter(capacity=100, error_rate=0.01)
+        bloom.add('testuser')
+        bloom.add('testuser')
+        self.assertEqual(bloom.count, 1)
+
+@override_settings(AVAILABILITY_INDEX_SYNC_INTERVAL=3600)
+class AvailabilityIndexTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='TestPass123!'
+        )
+        self.index = AvailabilityIndex()
+        self.index.build()
+
+    def test_taken_values(self):
+        self.assertTrue(self.index.is_taken('username', 'testuser'))
+        self.assertTrue(self.index.is_taken('email', 'test@example.com'))
+
+    def test_free_values_skip_the_database(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(self.index.is_taken('username', 'freeuser'))
+
+    def test_add_and_discard(self):
+        other = User(username='other', email='other@example.com')
+        self.index.add(other)
+        # Possible positives are confirmed against the database.
+        self.assertFalse(self.index.is_taken('username', 'other'))
+
+        self.index.discard(self.user)
+        self.user.delete()
+        with patch.object(self.index, 'start_background_build') as rebuild:
+            self.assertFalse(self.index.is_taken('username', 'testuser'))
+        rebuild.assert_called_once_with()
+
+    def test_falls_back_to_database_until_built(self):
+        index = AvailabilityIndex()
+        self.assertFalse(index.ready)
+        self.assertTrue(index.is_taken('username', 'testuser'))
+        self.assertFalse(index.is_taken('username', 'freeuser'))
+
+    def test_picks_up_updates_without_signals(self):
+        User.objects.filter(pk=self.user.pk).update(username='renamed')
+        self.index.sync()
+        self.assertTrue(self.index.is_taken('username', 'renamed'))
+
+        User.objects.bulk_update([User(pk=self.user.pk, email='new@example.com')], ['email'])
+        self.index.sync()
+        self.assertTrue(self.index.is_taken('email', 'new@example.com'))
+
+    def test_picks_up_rows_written_elsewhere(self):
+        User.objects.bulk_create([User(username='bulkuser', email='bulk@example.com')])
+        self.index.sync()
+        self.assertTrue(self.index.is_taken('username', 'bulkuser'))
+
+    def test_only_identity_changes_move_updated_at(self):
+        updated_at = User.objects.get(pk=self.user.pk).updated_at
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(User.objects.get(pk=self.user.pk).updated_at, updated_at)
+
+        User.objects.filter(pk=self.user.pk).update(email='moved@example.com')
+        self.assertGreater(User.objects.get(pk=self.user.pk).updated_at, updated_at)
+
+    def test_sync_runs_in_background(self):
+        with self.settings(AVAILABILITY_INDEX_SYNC_INTERVAL=0), \
+                patch.object(self.index, '_start_thread') as start_thread:
+            with self.assertNumQueries(0):
+                self.assertFalse(self.index.is_taken('username', 'freeuser'))
+        start_thread.assert_called_once_with('_syncer', self.index.sync, 'availability-index-sync')
@@ -0,0 +1,122 @@
+import tempfile
+import time
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
+from ..middleware import AdmissionControlMiddleware, Bulkhead, parse_request_start
+
+User = get_user_model()
+
+LOCK_DIR = tempfile.mkdtemp()
+
+def admission_control(**auth):
+    return {
+        'LOCK_DIR': LOCK_DIR,
+        'CLASSES': {
+            'auth': {'views': ['users:login'], 'retry_after': 2, **auth},
+            'default': {'deadline_ms': 5000},
+        },
+    }
+
+class BulkheadTests(TestCase):
+    def test_slots_are_exclusive(self):
+        bulkhead = Bulkhead('test-exclusive', 2, LOCK_DIR)
+        first = bulkhead.acquire()
+        second = bulkhead.acquire()
+        self.assertIsNotNone(first)
+        self.assertIsNotNone(second)
+        self.assertIsNone(bulkhead.acquire())
+
+        bulkhead.release(first)
+        third = bulkhead.acquire()
+        self.assertIsNotNone(third)
+        bulkhead.release(second)
+        bulkhead.release(third)
+
+class ParseRequestStartTests(TestCase):
+    def test_formats(self):
+        self.assertEqual(parse_request_start('t=1700000000.5'), 1700000000.5)
+        self.assertEqual(parse_request_start('1700000000500'), 1700000000.5)
+        self.assertEqual(parse_request_start('1700000000500000'), 1700000000.5)
+        self.assertIsNone(parse_request_start('garbage'))
+        self.assertIsNone(parse_request_start(None))
+
+class AdmissionControlMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.login_url = reverse('users:login')
+        User.objects.create_user(username='testuser', email='test@example.com', password='TestPass123!')
+        self.login_data = {'username': 'testuser', 'password': 'TestPass123!'}
+
+    @override_settings(ADMISSION_CONTROL=admission_control(max_concurrent=1))
+    def test_full_bulkhead_sheds_auth_requests(self):
+        bulkhead = Bulkhead('auth', 1, LOCK_DIR)
+        slot = bulkhead.acquire()
+        try:
+            response = self.client.post(self.login_url, self.login_data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertEqual(response['Retry-After'], '2')
+
+            # Other classes are not affected by the auth bulkhead.
+            response = self.client.post(reverse('users:logout'))
+            self.assertNotEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        finally:
+            bulkhead.release(slot)
+
+        response = self.client.post(self.login_url, self.login_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(ADMISSION_CONTROL=admission_control(deadline_ms=1000))
+    def test_request_queued_past_deadline_is_shed(self):
+        response = self.client.post(
+            self.login_url, self.login_data, format='json',
+            HTTP_X_REQUEST_START=f't={time.time() - 2:.3f}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        response = self.client.post(
+            self.login_url, self.login_data, format='json',
+            HTTP_X_REQUEST_START=f't={time.time():.3f}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(ADMISSION_CONTROL=admission_control(deadline_ms=1000))
+    def test_predicted_miss_is_shed_until_latency_decays(self):
+        middleware = AdmissionControlMiddleware(lambda request: HttpResponse())
+        middleware.latency['auth'] = 0.8
+        # Queued 0.5s: under the 1s deadline, but not with 0.8s of work left.
+        request = RequestFactory().post(
+            self.login_url, HTTP_X_REQUEST_START=f't={time.time() - 0.5:.3f}'
+        )
+        request.resolver_match = resolve(self.login_url)
+
+        response = middleware.process_view(request, None, (), {})
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertLess(middleware.latency['auth'], 0.8)
+
+        rejected = 1
+        while middleware.process_view(request, None, (), {}) is not None:
+            rejected += 1
+            self.assertLess(rejected, 10)
+        self.assertLessEqual(middleware.latency['auth'], 0.5)
+        self.assertIsNotNone(getattr(request, '_admission', None))
+
+    @override_settings(ADMISSION_CONTROL=admission_control(deadline_ms=10000))
+    def test_client_deadline_header_tightens_deadline(self):
+        response = self.client.post(
+            self.login_url, self.login_data, format='json',
+            HTTP_X_REQUEST_START=f't={time.time() - 2:.3f}',
+            HTTP_X_REQUEST_TIMEOUT='1000'
+        )
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    @override_settings(ADMISSION_CONTROL={'ENABLED': False})
+    def test_disabled(self):
+        response = self.client.post(
+            self.login_url, self.login_data, format='json',
+            HTTP_X_REQUEST_START='t=1'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
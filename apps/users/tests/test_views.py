@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
@@ -6,6 +6,10 @@ from rest_framework import status
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.contrib.auth.tokens import default_token_generator
+from unittest.mock import patch
+from django.core.cache import cache
+from rest_framework.throttling import ScopedRateThrottle
+from ..availability import AvailabilityIndex
 
 User = get_user_model()
 
@@ -57,6 +61,15 @@ class AuthenticationTests(TestCase):
         response = self.client.post(self.login_url, login_data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_user_login_non_string_username(self):
+        for username in (123, {'a': 1}):
+            login_data = {
+                'username': username,
+                'password': 'x'
+            }
+            response = self.client.post(self.login_url, login_data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_user_logout(self):
         # Create and login user
         user = User.objects.create_user(username='testuser', email='test@example.com', password='TestPass123!')
@@ -154,4 +167,43 @@ class UsernameUpdateTests(TestCase):
             'current_password': 'TestPass123!'
         }
         response = self.client.put(self.update_username_url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+@override_settings(AVAILABILITY_INDEX_SYNC_INTERVAL=3600)
+class UsernameAvailabilityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('users:username-available')
+        User.objects.create_user(username='testuser', email='test@example.com', password='TestPass123!')
+        index = AvailabilityIndex()
+        index.build()
+        patcher = patch('apps.users.views.availability_index', index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_username_taken(self):
+        response = self.client.get(self.url, {'username': 'testuser'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['available'])
+
+    def test_username_available(self):
+        response = self.client.get(self.url, {'username': 'freeuser'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['available'])
+
+    def test_email_is_not_checked(self):
+        response = self.client.get(self.url, {'email': 'test@example.com'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_missing_parameter(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch.object(ScopedRateThrottle, 'THROTTLE_RATES', {'username-available': '2/min'})
+    def test_throttled(self):
+        for _ in range(2):
+            response = self.client.get(self.url, {'username': 'freeuser'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(self.url, {'username': 'freeuser'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
\ No newline at end of file
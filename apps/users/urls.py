@@ -7,6 +7,7 @@ from .views import (
     LogoutView,
     ChangePasswordView,
     UpdateUsernameView,
+    UsernameAvailableView,
     RequestPasswordResetView,
     ResetPasswordView,
 )
@@ -26,6 +27,7 @@ urlpatterns = [
     
     # Profile management
     path('update-username/', UpdateUsernameView.as_view(), name='update-username'),
+    path('username-available/', UsernameAvailableView.as_view(), name='username-available'),
     path('users/', UserListView.as_view(), name='user-list'),
     path('users/<int:pk>/', UserDetailView.as_view(), name='user-detail'),
 ]
\ No newline at end of file
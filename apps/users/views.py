@@ -2,12 +2,16 @@ from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.throttling import ScopedRateThrottle
 from django.contrib.auth import get_user_model, login, logout
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes
 from django.core.mail import send_mail
 from django.conf import settings
+from . import audit
+from .availability import availability_index
+from .models import AuditEvent
 from .serializers import (
     UserSerializer,
     RegisterSerializer,
@@ -33,9 +37,11 @@ class LoginView(APIView):
         
         if user and user.check_password(password):
             login(request, user)
+            audit.record(AuditEvent.LOGIN, request, user)
             serializer = UserSerializer(user)
             return Response(serializer.data)
         
+        audit.record(AuditEvent.LOGIN_FAILED, request, user, username=username or '')
         return Response(
             {"error": "Invalid credentials"},
             status=status.HTTP_400_BAD_REQUEST
@@ -65,6 +71,7 @@ class ChangePasswordView(generics.UpdateAPIView):
 
         user.set_password(serializer.data.get("new_password"))
         user.save()
+        audit.record(AuditEvent.PASSWORD_CHANGE, request, user)
         return Response(status=status.HTTP_200_OK)
 
 class UpdateUsernameView(generics.UpdateAPIView):
@@ -88,11 +95,34 @@ class UpdateUsernameView(generics.UpdateAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        old_username = instance.username
         instance.username = new_username
         instance.save()
+        audit.record(AuditEvent.USERNAME_CHANGE, request, instance, detail=old_username)
         
         return Response(UserSerializer(instance).data)
 
+class UsernameAvailableView(APIView):
+    permission_classes = (AllowAny,)
+    authentication_classes = ()
+    throttle_classes = (ScopedRateThrottle,)
+    throttle_scope = 'username-available'
+
+    def get(self, request):
+        # Emails are only checked on submit, by RegisterSerializer's exact
+        # query, so this anonymous endpoint cannot enumerate addresses.
+        username = request.query_params.get('username')
+        if not username:
+            return Response(
+                {"error": "Provide a username to check."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            'username': username,
+            'available': not availability_index.is_taken('username', username),
+        })
+
 class RequestPasswordResetView(APIView):
     permission_classes = (AllowAny,)
 
@@ -112,6 +142,7 @@ class RequestPasswordResetView(APIView):
                 [email],
                 fail_silently=False,
             )
+            audit.record(AuditEvent.PASSWORD_RESET_REQUEST, request, user)
             
         return Response({"message": "If an account exists with this email, a password reset link has been sent."})
 
@@ -135,6 +166,7 @@ class ResetPasswordView(APIView):
         if default_token_generator.check_token(user, token):
             user.set_password(new_password)
             user.save()
+            audit.record(AuditEvent.PASSWORD_RESET, request, user)
             return Response({"message": "Password has been reset successfully."})
         else:
             return Response(
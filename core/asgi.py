@@ -2,4 +2,10 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
-application = get_asgi_application()
\ No newline at end of file
+application = get_asgi_application()
+
+from apps.users.audit import audit_log  # noqa: E402
+from apps.users.availability import availability_index  # noqa: E402
+
+availability_index.start_background_build()
+audit_log.start()
\ No newline at end of file
@@ -31,6 +31,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'apps.users.middleware.AdmissionControlMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -110,4 +111,47 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
+    'DEFAULT_THROTTLE_RATES': {
+        'username-available': os.getenv('USERNAME_AVAILABLE_THROTTLE_RATE', '60/min'),
+    },
+}
+
+# Username/email availability index
+AVAILABILITY_INDEX_ERROR_RATE = float(os.getenv('AVAILABILITY_INDEX_ERROR_RATE', '0.01'))
+AVAILABILITY_INDEX_SYNC_INTERVAL = float(os.getenv('AVAILABILITY_INDEX_SYNC_INTERVAL', '1.0'))
+
+# Admission control: per endpoint class concurrency limits and queue deadlines
+ADMISSION_CONTROL = {
+    'ENABLED': os.getenv('ADMISSION_CONTROL_ENABLED', 'True') == 'True',
+    'CLASSES': {
+        # Password hashing endpoints get a bulkhead so they cannot occupy
+        # every worker and starve cheap reads.
+        'auth': {
+            'views': [
+                'users:login',
+                'users:register',
+                'users:change-password',
+                'users:reset-password',
+                'users:update-username',
+            ],
+            'max_concurrent': int(os.getenv('ADMISSION_AUTH_MAX_CONCURRENT', '4')),
+            'deadline_ms': int(os.getenv('ADMISSION_AUTH_DEADLINE_MS', '2000')),
+            'retry_after': 2,
+        },
+        'default': {
+            'deadline_ms': int(os.getenv('ADMISSION_DEFAULT_DEADLINE_MS', '5000')),
+            'retry_after': 1,
+        },
+    },
+}
+
+# Security audit log
+AUDIT_LOG = {
+    # 'database' bulk-inserts into users.AuditEvent; 'ndjson' writes hourly files.
+    'SINK': os.getenv('AUDIT_LOG_SINK', 'database'),
+    'BUFFER_SIZE': int(os.getenv('AUDIT_LOG_BUFFER_SIZE', '10000')),
+    'BATCH_SIZE': int(os.getenv('AUDIT_LOG_BATCH_SIZE', '500')),
+    'FLUSH_INTERVAL': float(os.getenv('AUDIT_LOG_FLUSH_INTERVAL', '1.0')),
+    'BLOCK_TIMEOUT': float(os.getenv('AUDIT_LOG_BLOCK_TIMEOUT', '0.0')),
+    'NDJSON_DIR': os.getenv('AUDIT_LOG_NDJSON_DIR', str(BASE_DIR / 'logs' / 'audit')),
 }
\ No newline at end of file